@@ -11,24 +11,46 @@ Coast LLC. See https://company.wizards.com/fancontentpolicy for more
 details.
 """
 
+import concurrent.futures
 import datetime
+import functools
 import json
 import getpass
 import gzip
+import io
 import itertools
 import logging
 import logging.handlers
 import os
 import os.path
+import queue
 import re
+import sys
+import threading
 import time
 import traceback
 import uuid
 
 from collections import defaultdict, namedtuple
+from operator import itemgetter
 
-import dateutil.parser
 import requests
+import urllib3.util.retry
+
+try:
+    import orjson
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+except ModuleNotFoundError:
+    orjson = None
+    json_loads = json.loads
+    json_dumps = lambda obj: json.dumps(obj).encode('utf8')
+
+try:
+    import watchdog.events
+    import watchdog.observers
+except ModuleNotFoundError:
+    watchdog = None
 
 LOG_FOLDER = os.path.join(os.path.expanduser('~'), '.seventeenlands')
 if not os.path.exists(LOG_FOLDER):
@@ -48,6 +70,7 @@ logger.setLevel(logging.INFO)
 logger.info(f'Saving logs to {LOG_FILENAME}')
 
 CLIENT_VERSION = '0.1.18.p'
+THIS_VERSION = tuple(int(i) for i in CLIENT_VERSION.split('.')[:-1])
 
 OSX_LOG_ROOT = os.path.join('Library','Logs')
 WINDOWS_LOG_ROOT = os.path.join('users', getpass.getuser(), 'AppData', 'LocalLow')
@@ -74,15 +97,41 @@ POSSIBLE_PREVIOUS_FILEPATHS = list(map(lambda root_and_path: os.path.join(*root_
 
 CONFIG_FILE = os.path.join(os.path.expanduser('~'), '.mtga_follower.ini')
 
-LOG_START_REGEX_TIMED = re.compile(r'^\[(UnityCrossThreadLogger|Client GRE)\]([\d:/ -]+(AM|PM)?)')
-LOG_START_REGEX_UNTIMED = re.compile(r'^\[(UnityCrossThreadLogger|Client GRE)\]')
+LOG_START_REGEX = re.compile(r'^\[(UnityCrossThreadLogger|Client GRE)\]([\d:/ -]+(AM|PM)?)?')
 TIMESTAMP_REGEX = re.compile('^([\\d/.-]+[ T][\\d]+:[\\d]+:[\\d]+( AM| PM)?)')
 STRIPPED_TIMESTAMP_REGEX = re.compile('^(.*?)[: /]*$')
-JSON_START_REGEX = re.compile(r'[\[\{]')
-ACCOUNT_INFO_REGEX = re.compile(r'.*Updated account\. DisplayName:(.*), AccountID:(.*), Token:.*')
+ACCOUNT_INFO_REGEX = re.compile(r'Updated account\. DisplayName:(.*), AccountID:(.*), Token:')
+# A log entry is only decoded if it contains at least one of these, since every
+# handler in Follower.__handle_blob (and the utc time tracking) depends on one.
+# Separate substring searches beat a single regex alternation of the markers on
+# large entries, since each `in` check is a fast C scan.
+BLOB_MARKERS = (
+    'timestamp',
+    'Client.Connected',
+    'DraftStatus',
+    'Draft.MakePick',
+    'Draft.MakeHumanDraftPick',
+    'Event.JoinPodmaking',
+    'Event.DeckSubmit',
+    'CurrentEventState',
+    'HumanDraft._internalState',
+    'matchGameRoomStateChangedEvent',
+    'greToClientEvent',
+    'clientToMatchServiceMessageType',
+    'limitedStep',
+    'opponentRankingClass',
+    'PlayerInventory.GetPlayerCardsV3',
+    'Draft.Notif',
+)
 SLEEP_TIME = 0.5
-
-TIME_FORMATS = (
+# Upper bound on a wait when file change events wake the follower; only a safety net for missed events.
+# On Windows, ReadDirectoryChangesW may report writes to a file that is held open late or not at all,
+# so the events there can only make the follower faster, never slower than plain polling.
+WATCHED_SLEEP_TIME = SLEEP_TIME if sys.platform == 'win32' else 5
+READ_BLOCK_SIZE = 1 << 20
+
+# Reordered at runtime so the most recently matched format is tried first.
+TIME_FORMATS = [
     '%Y-%m-%d %I:%M:%S %p',
     '%Y-%m-%d %H:%M:%S',
     '%m/%d/%Y %I:%M:%S %p',
@@ -90,7 +139,7 @@ TIME_FORMATS = (
     '%Y/%m/%d %I:%M:%S %p',
     '%Y/%m/%d %H:%M:%S',
     '%d/%m/%Y %H:%M:%S',
-)
+]
 OUTPUT_TIME_FORMAT = '%Y%m%d%H%M%S'
 
 API_ENDPOINT = 'https://www.17lands.com'
@@ -111,10 +160,29 @@ RETRIES = 2
 IS_CODE_FOR_RETRY = lambda code: code >= 500 and code < 600
 IS_SUCCESS_CODE = lambda code: code >= 200 and code < 300
 DEFAULT_RETRY_SLEEP_TIME = 1
+VERSION_CHECK_TIMEOUT = (3, 5)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+CONNECTION_RETRIES = 3
+CONNECTION_RETRY_BACKOFF = 0.2
 SERVER_SIDE_GAME_HISTORY_ENABLED_CHECK_INTERVAL = datetime.timedelta(minutes=30)
 
 GameHistoryConfig = namedtuple('GameHistoryConfig', ('last_checked', 'enabled'))
+Arguments = namedtuple('Arguments', ('log_file', 'host', 'once'))
+LONG_OPTIONS = ('--help', '--log_file', '--host', '--once')
+
+USAGE = f"""usage: mtga_follower.py [-h] [-l LOG_FILE] [--host HOST] [--once]
 
+MTGA log follower
+
+optional arguments:
+  -h, --help            show this help message and exit
+  -l LOG_FILE, --log_file LOG_FILE
+                        Log filename to process. If not specified, will try one of {POSSIBLE_CURRENT_FILEPATHS}
+  --host HOST           Host to submit requests to. If not specified, will use {API_ENDPOINT}
+  --once                Whether to stop after parsing the file once (default is to continue waiting for updates to the file)"""
+
+@functools.lru_cache(maxsize=4096)
 def extract_time(time_str):
     """
     Convert a time string in various formats to a datetime.
@@ -125,29 +193,85 @@ def extract_time(time_str):
     :raises ValueError: Raises an exception if it cannot interpret the string.
     """
     time_str = STRIPPED_TIMESTAMP_REGEX.match(time_str).group(1)
-    for possible_format in TIME_FORMATS:
+    for i, possible_format in enumerate(TIME_FORMATS):
         try:
-            return datetime.datetime.strptime(time_str, possible_format)
+            result = datetime.datetime.strptime(time_str, possible_format)
         except ValueError:
-            pass
+            continue
+        if i > 0:
+            TIME_FORMATS.insert(0, TIME_FORMATS.pop(i))
+        return result
     raise ValueError(f'Unsupported time format: "{time_str}"')
 
-def json_value_matches(expectation, path, blob):
+def find_json_start(text):
     """
-    Check if the value nested at a given path in a JSON blob matches the expected value.
+    Find where the first JSON object or array in a string begins.
 
-    :param expectation: The value to check against.
-    :param path:        A list of keys for the nested value.
-    :param blob:        The JSON blob to check in.
+    :param text: The string to search.
 
-    :returns: Whether or not the value exists at the given path and it matches expectation.
+    :returns: The index of the first '{' or '[', or -1 if there is neither.
     """
-    for p in path:
-        if p in blob:
-            blob = blob[p]
-        else:
-            return False
-    return blob == expectation
+    if text[:1] in ('{', '['):
+        return 0
+    brace = text.find('{')
+    # Only look for a bracket before the brace, rather than scanning the whole string again.
+    bracket = text.find('[', 0, brace if brace >= 0 else len(text))
+    return bracket if bracket >= 0 else brace
+
+def create_session():
+    """
+    Create a requests session that keeps connections alive and retries failed connections.
+    Only connection failures are retried here. Read errors and timeouts are raised straight
+    away, and retrying on server error responses is left to the callers. Callers should not
+    also loop on connection errors, or the retries multiply.
+
+    :returns: The new session.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=urllib3.util.retry.Retry(
+            total=CONNECTION_RETRIES,
+            read=0,
+            backoff_factor=CONNECTION_RETRY_BACKOFF,
+        ),
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+SESSION = create_session()
+
+def watch_file(filename, changed):
+    """
+    Set an event whenever a file is created, modified or moved into place. Requires watchdog.
+
+    :param filename: The file to watch.
+    :param changed:  The threading.Event to set on changes.
+
+    :returns: The running observer, or None if the file cannot be watched.
+    """
+    if watchdog is None:
+        return None
+
+    path = os.path.normcase(os.path.abspath(filename))
+
+    class Handler(watchdog.events.FileSystemEventHandler):
+        def on_any_event(self, event):
+            for event_path in (event.src_path, getattr(event, 'dest_path', None)):
+                if event_path and os.path.normcase(os.path.abspath(event_path)) == path:
+                    changed.set()
+
+    observer = watchdog.observers.Observer()
+    observer.daemon = True
+    try:
+        observer.schedule(Handler(), os.path.dirname(path))
+        observer.start()
+    except OSError as e:
+        logger.warning(f'Could not watch {filename} for changes ({e}); polling instead')
+        return None
+    return observer
 
 def get_rank_string(rank_class, level, percentile, place, step):
     """
@@ -161,17 +285,19 @@ def get_rank_string(rank_class, level, percentile, place, step):
 
     :returns: Serialized rank string (e.g. "Gold-3-0.0-0-2")
     """
-    return '-'.join(str(x) for x in [rank_class, level, percentile, place, step])
+    return f'{rank_class}-{level}-{percentile}-{place}-{step}'
 
 class Follower:
     """Follows along a log, parses the messages, and passes along the parsed data to the API endpoint."""
 
-    def __init__(self, token, host, history_enabled):
+    def __init__(self, token, host, history_enabled, session=SESSION):
         self.host = host
         self.token = token
-        self.buffer = []
+        self.envelope = {'client_version': CLIENT_VERSION, 'token': token}
+        self.buffer = io.StringIO()
         self.cur_log_time = datetime.datetime.fromtimestamp(0)
         self.last_utc_time = datetime.datetime.fromtimestamp(0)
+        self.last_utc_time_iso = None
         self.last_raw_time = ''
         self.json_decoder = json.JSONDecoder()
         self.cur_user = None
@@ -182,23 +308,37 @@ class Follower:
         self.cur_opponent_match_id = None
         self.current_match_event_id = None
         self.starting_team_id = None
-        self.objects_by_owner = defaultdict(dict)
-        self.opening_hand_count_by_seat = defaultdict(int)
-        self.opening_hand = defaultdict(list)
-        self.drawn_hands = defaultdict(list)
-        self.drawn_cards_by_instance_id = defaultdict(dict)
-        self.cards_in_hand = defaultdict(list)
+        # Per-seat state is indexed by seat id, which is 1 or 2; slot 0 is unused.
+        self.objects_by_owner = [{}, {}, {}]
+        self.opening_hand_count_by_seat = [0, 0, 0]
+        self.opening_hand = [(), (), ()]
+        self.drawn_hands = [[], [], []]
+        self.drawn_cards_by_instance_id = [{}, {}, {}]
+        self.cards_in_hand = [(), (), ()]
         self.history_enabled = history_enabled
         self.screen_names = defaultdict(lambda: '')
         self.game_history_events = []
         self.server_side_game_history_enabled = GameHistoryConfig(last_checked=None, enabled=False)
+        self.blob_handlers = {
+            ('params', 'messageName', 'Client.Connected'): self.__handle_login,
+            # ('params', 'messageName', 'DuelScene.GameStop'): self.__handle_game_end,
+            ('method', 'Draft.MakePick'): self.__handle_draft_pick,
+            ('method', 'Draft.MakeHumanDraftPick'): self.__handle_human_draft_pick,
+            ('method', 'Event.JoinPodmaking'): self.__handle_joined_pod,
+            ('method', 'Event.DeckSubmit'): self.__handle_deck_submission,
+            ('method', 'Event.DeckSubmitV3'): self.__handle_deck_submission_v3,
+        }
+
+        self.session = session
+        self.upload_queue = queue.Queue()
+        threading.Thread(target=self.__upload_loop, daemon=True).start()
 
 
     def __should_submit_game_history(self):
         last_checked = self.server_side_game_history_enabled.last_checked
         now = datetime.datetime.utcnow()
         if last_checked is None or last_checked < now - SERVER_SIDE_GAME_HISTORY_ENABLED_CHECK_INTERVAL:
-            response = requests.get(f'{self.host}/{ENDPOINT_GAME_HISTORY_ENABLED}/{self.token}')
+            response = self.session.get(f'{self.host}/{ENDPOINT_GAME_HISTORY_ENABLED}/{self.token}')
             if IS_SUCCESS_CODE(response.status_code):
                 self.server_side_game_history_enabled = GameHistoryConfig(last_checked=now, enabled=response.text == 'true')
             else:
@@ -218,21 +358,55 @@ class Follower:
 
         :returns: The response object (including status_code and text fields).
         """
-        blob['client_version'] = CLIENT_VERSION
-        blob['token'] = self.token
-        blob['utc_time'] = self.last_utc_time.isoformat()
+        self.__add_envelope(blob)
+        # Let anything already queued go out first so the server sees requests in log order.
+        self.upload_queue.join()
+        return self.__send_post(endpoint, blob, num_retries=num_retries, sleep_time=sleep_time, use_gzip=use_gzip)
+
+    def __queue_post(self, endpoint, blob, use_gzip=False):
+        """
+        Add client version to a JSON blob and queue it to be sent to an endpoint by the
+        upload thread. Blobs are sent one at a time, in the order they were queued.
+
+        :param endpoint: The http endpoint to hit.
+        :param blob:     The JSON data to send in the body of the post request.
+        :param use_gzip: Whether to gzip the body of the post request.
+        """
+        self.__add_envelope(blob)
+        self.upload_queue.put((endpoint, blob, use_gzip))
+
+    def __upload_loop(self):
+        """Send queued blobs over the shared session. Runs on the upload thread."""
+        while True:
+            endpoint, blob, use_gzip = self.upload_queue.get()
+            try:
+                self.__send_post(endpoint, blob, use_gzip=use_gzip)
+            except Exception as e:
+                logger.error(f'Error {e} while posting to {endpoint}')
+                logger.error(traceback.format_exc())
+            finally:
+                self.upload_queue.task_done()
+
+    def __add_envelope(self, blob):
+        """Add the fields sent with every request to a JSON blob."""
+        blob.update(self.envelope)
+        # Formatted lazily, since many more log messages carry a timestamp than get posted.
+        if self.last_utc_time_iso is None:
+            self.last_utc_time_iso = self.last_utc_time.isoformat()
+        blob['utc_time'] = self.last_utc_time_iso
+
+    def __send_post(self, endpoint, blob, num_retries=RETRIES, sleep_time=DEFAULT_RETRY_SLEEP_TIME, use_gzip=False):
+        """Send a JSON blob via post request, retrying on server errors."""
+        data = json_dumps(blob)
+        headers = {'content-type': 'application/json'}
+        if use_gzip:
+            data = gzip.compress(data)
+            headers['content-encoding'] = 'gzip'
 
         tries_left = num_retries + 1
         while tries_left > 0:
             tries_left -= 1
-            if use_gzip:
-                data = gzip.compress(json.dumps(blob).encode('utf8'))
-                response = requests.post(endpoint, data=data, headers={
-                    'content-type': 'application/json',
-                    'content-encoding': 'gzip',
-                })
-            else:
-                response = requests.post(endpoint, json=blob)
+            response = self.session.post(endpoint, data=data, headers=headers)
             if not IS_CODE_FOR_RETRY(response.status_code):
                 break
             logger.warning(f'Got response code {response.status_code}; retrying {tries_left} more times')
@@ -248,14 +422,35 @@ class Follower:
         :param follow:   Whether or not to continue looking for updates to the file after parsing
                          all the initial lines.
         """
+        # Without watchdog, nothing sets this and waiting on it is the same as sleeping.
+        changed = threading.Event()
+        observer = watch_file(filename, changed) if follow else None
+        sleep_time = SLEEP_TIME if observer is None else WATCHED_SLEEP_TIME
+        try:
+            self.__read_log(filename, follow, changed, sleep_time)
+        finally:
+            if observer is not None:
+                observer.stop()
+
+    def __read_log(self, filename, follow, changed, sleep_time):
+        """Read a log file, waiting up to sleep_time on the changed event between reads when following."""
         last_read_time = time.time()
         while True:
             try:
-                with open(filename) as f:
+                with open(filename, 'rb', buffering=0) as f:
+                    pending = bytearray()
                     while True:
-                        line = f.readline()
-                        if line:
-                            self.__append_line(line)
+                        chunk = f.read(READ_BLOCK_SIZE)
+                        if chunk:
+                            pending += chunk
+                            # Decode every complete line at once and keep the partial last line for later.
+                            end = pending.rfind(b'\n') + 1
+                            if end > 0:
+                                lines = pending[:end].decode('utf-8', 'replace').split('\n')
+                                del pending[:end]
+                                lines.pop()
+                                for line in lines:
+                                    self.__append_line(line + '\n')
                             last_read_time = time.time()
                         else:
                             self.__handle_complete_log_entry()
@@ -263,13 +458,21 @@ class Follower:
                             if last_modified_time > last_read_time:
                                 break
                             elif follow:
-                                time.sleep(SLEEP_TIME)
+                                changed.wait(sleep_time)
+                                changed.clear()
                             else:
                                 break
+
+                    # Flush a trailing line that never got its newline.
+                    if pending:
+                        self.__append_line(pending.decode('utf-8', 'replace'))
+                        self.__handle_complete_log_entry()
             except FileNotFoundError:
-                time.sleep(SLEEP_TIME)
+                changed.wait(sleep_time)
+                changed.clear()
 
             if not follow:
+                self.upload_queue.join()
                 logger.info('Done processing file.')
                 break
 
@@ -277,41 +480,45 @@ class Follower:
         """Add a complete line (not necessarily a complete message) from the log."""
         self.__maybe_handle_account_info(line)
 
-        timestamp_match = TIMESTAMP_REGEX.match(line)
+        # Timestamps always start with a digit and log starts with '[', so each line needs at most one regex.
+        first_char = line[:1]
+        timestamp_match = first_char.isdigit() and TIMESTAMP_REGEX.match(line)
         if timestamp_match:
-            self.last_raw_time = timestamp_match.group(1)
-            self.cur_log_time = extract_time(self.last_raw_time)
+            self.__set_raw_time(timestamp_match.group(1))
 
-        match = LOG_START_REGEX_UNTIMED.match(line)
+        match = first_char == '[' and LOG_START_REGEX.match(line)
         if match:
             self.__handle_complete_log_entry()
 
-            timed_match = LOG_START_REGEX_TIMED.match(line)
-            if timed_match:
-                self.last_raw_time = timed_match.group(2)
-                self.cur_log_time = extract_time(self.last_raw_time)
-                self.buffer.append(line[timed_match.end():])
-            else:
-                self.buffer.append(line[match.end():])
+            if match.group(2):
+                self.__set_raw_time(match.group(2))
+            self.buffer.write(line[match.end():])
         else:
-            self.buffer.append(line)
+            self.buffer.write(line)
+
+    def __set_raw_time(self, raw_time):
+        """Update the current log time, skipping the parse when the raw timestamp hasn't changed."""
+        if raw_time == self.last_raw_time:
+            return
+        self.last_raw_time = raw_time
+        self.cur_log_time = extract_time(raw_time)
 
     def __handle_complete_log_entry(self):
         """Mark the current log message complete. Should be called when waiting for more log messages."""
-        if len(self.buffer) == 0:
+        if self.buffer.tell() == 0:
             return
+
+        full_log = self.buffer.getvalue()
+        self.buffer = io.StringIO()
         if self.cur_log_time is None:
-            self.buffer = []
             return
 
-        full_log = ''.join(self.buffer)
         try:
             self.__handle_blob(full_log)
         except Exception as e:
             logger.error(f'Error {e} while processing {full_log}')
             logger.error(traceback.format_exc())
 
-        self.buffer = []
         # self.cur_log_time = None
 
     def __maybe_get_utc_timestamp(self, blob):
@@ -326,20 +533,28 @@ class Follower:
         if timestamp is None:
             return None
 
-        try:
+        if isinstance(timestamp, (int, float)) or timestamp.isdigit():
             seconds_since_year_1 = int(timestamp) / 10000000
             return datetime.datetime.fromordinal(1) + datetime.timedelta(seconds=seconds_since_year_1)
+
+        try:
+            return datetime.datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
         except ValueError:
+            # fromisoformat only takes 3 or 6 fractional digits before Python 3.11
+            import dateutil.parser
             return dateutil.parser.isoparse(timestamp)
 
     def __handle_blob(self, full_log):
         """Attempt to parse a complete log message and send the data if relevant."""
-        match = JSON_START_REGEX.search(full_log)
-        if not match:
+        if not any(marker in full_log for marker in BLOB_MARKERS):
+            return
+
+        json_start = find_json_start(full_log)
+        if json_start < 0:
             return
 
         try:
-            json_obj, end = self.json_decoder.raw_decode(full_log, match.start())
+            json_obj = self.__decode_json(full_log, json_start)
         except json.JSONDecodeError as e:
             logger.debug(f'Ran into error {e} when parsing at {self.cur_log_time}. Data was: {full_log}')
             return
@@ -351,26 +566,25 @@ class Follower:
             maybe_time = self.__maybe_get_utc_timestamp(json_obj)
             if maybe_time is not None:
                 self.last_utc_time = maybe_time
+                self.last_utc_time_iso = None
         except:
             pass
 
-        if json_value_matches('Client.Connected', ['params', 'messageName'], json_obj):
-            self.__handle_login(json_obj)
-        # elif json_value_matches('DuelScene.GameStop', ['params', 'messageName'], json_obj):
-        #     self.__handle_game_end(json_obj)
+        # Look up handlers keyed on a discriminating value first, then fall back to key checks.
+        handler = None
+        params = json_obj.get('params')
+        message_name = params.get('messageName') if isinstance(params, dict) else None
+        if isinstance(message_name, str):
+            handler = self.blob_handlers.get(('params', 'messageName', message_name))
+        method = json_obj.get('method')
+        if handler is None and isinstance(method, str):
+            handler = self.blob_handlers.get(('method', method))
+
+        if handler is not None:
+            handler(json_obj)
         elif 'DraftStatus' in json_obj:
             self.__handle_draft_log(json_obj)
-        elif json_value_matches('Draft.MakePick', ['method'], json_obj):
-            self.__handle_draft_pick(json_obj)
-        elif json_value_matches('Draft.MakeHumanDraftPick', ['method'], json_obj):
-            self.__handle_human_draft_pick(json_obj)
-        elif json_value_matches('Event.JoinPodmaking', ['method'], json_obj):
-            self.__handle_joined_pod(json_obj)
-        elif json_value_matches('Event.DeckSubmit', ['method'], json_obj):
-            self.__handle_deck_submission(json_obj)
-        elif json_value_matches('Event.DeckSubmitV3', ['method'], json_obj):
-            self.__handle_deck_submission_v3(json_obj)
-        elif json_value_matches('DoneWithMatches', ['CurrentEventState'], json_obj):
+        elif json_obj.get('CurrentEventState') == 'DoneWithMatches':
             self.__handle_event_completion(json_obj)
         elif json_obj.get('ModuleInstanceData', {}).get('HumanDraft._internalState', {}).get('DraftId') is not None:
             self.__handle_event_course(json_obj)
@@ -379,7 +593,7 @@ class Follower:
         elif 'greToClientEvent' in json_obj and 'greToClientMessages' in json_obj['greToClientEvent']:
             for message in json_obj['greToClientEvent']['greToClientMessages']:
                 self.__handle_gre_to_client_message(message)
-        elif json_value_matches('ClientToMatchServiceMessageType_ClientToGREMessage', ['clientToMatchServiceMessageType'], json_obj):
+        elif json_obj.get('clientToMatchServiceMessageType') == 'ClientToMatchServiceMessageType_ClientToGREMessage':
             self.__handle_client_to_gre_message(json_obj.get('payload', {}))
         elif 'limitedStep' in json_obj:
             self.__handle_self_rank_info(json_obj)
@@ -392,18 +606,27 @@ class Follower:
         elif 'Draft.Notification ' in full_log and 'method' not in json_obj:
             self.__handle_draft_notification(json_obj)
 
+    def __decode_json(self, text, start):
+        """Decode the JSON value beginning at an index of a string, ignoring anything after it."""
+        if orjson is not None:
+            # orjson is much faster but rejects trailing data, so only fall back when it fails.
+            try:
+                return orjson.loads(text[start:])
+            except orjson.JSONDecodeError:
+                pass
+        json_obj, end = self.json_decoder.raw_decode(text, start)
+        return json_obj
+
     def __extract_payload(self, blob):
         if 'id' not in blob: return blob
         if 'payload' in blob:
             try:
-                json_obj, end = self.json_decoder.raw_decode(blob['payload'])
-                return json_obj
+                return self.__decode_json(blob['payload'], 0)
             except Exception as e:
                 return blob['payload']
         if 'request' in blob:
             try:
-                json_obj, end = self.json_decoder.raw_decode(blob['request'])
-                return json_obj
+                return self.__decode_json(blob['request'], 0)
             except Exception as e:
                 pass
 
@@ -429,14 +652,15 @@ class Follower:
         """Handle messages in the 'greToClientEvent' field."""
         # Add to game history before processing the messsage, since we may submit the game right away.
         if self.history_enabled:
-            if message_blob['type'] in ['GREMessageType_QueuedGameStateMessage', 'GREMessageType_GameStateMessage']:
+            if message_blob['type'] in {'GREMessageType_QueuedGameStateMessage', 'GREMessageType_GameStateMessage'}:
                 self.game_history_events.append(message_blob)
 
         if message_blob['type'] == 'GREMessageType_GameStateMessage':
             game_state_message = message_blob.get('gameStateMessage', {})
-            self.__maybe_handle_game_over_stage(message_blob.get('systemSeatIds', []), game_state_message)
+            system_seat_ids = message_blob.get('systemSeatIds', [])
+            self.__maybe_handle_game_over_stage(system_seat_ids, game_state_message)
             for game_object in game_state_message.get('gameObjects', []):
-                if game_object['type'] not in ('GameObjectType_Card', 'GameObjectType_SplitCard'):
+                if game_object['type'] not in {'GameObjectType_Card', 'GameObjectType_SplitCard'}:
                     continue
                 owner = game_object['ownerSeatId']
                 instance_id = game_object['instanceId']
@@ -447,9 +671,13 @@ class Follower:
             for zone in game_state_message.get('zones', []):
                 if zone['type'] == 'ZoneType_Hand':
                     owner = zone['ownerSeatId']
+                    # Only our own hands and drawn cards are reported, so skip the opponent's hand.
+                    if system_seat_ids and owner not in system_seat_ids:
+                        continue
                     player_objects = self.objects_by_owner[owner]
                     hand_card_ids = zone.get('objectInstanceIds', [])
-                    self.cards_in_hand[owner] = [player_objects.get(instance_id) for instance_id in hand_card_ids if instance_id]
+                    # Stored as tuples so they can be shared with drawn_hands and opening_hand without copying.
+                    self.cards_in_hand[owner] = tuple(player_objects.get(instance_id) for instance_id in hand_card_ids if instance_id)
                     for instance_id in hand_card_ids:
                         card_id = player_objects.get(instance_id)
                         if instance_id is not None and card_id is not None:
@@ -467,11 +695,10 @@ class Follower:
                 self.opening_hand_count_by_seat[player_id] += 1
 
                 if mulligan_count == len(self.drawn_hands[player_id]):
-                    self.drawn_hands[player_id].append(self.cards_in_hand[player_id].copy())
+                    self.drawn_hands[player_id].append(self.cards_in_hand[player_id])
 
-            if len(self.opening_hand) == 0 and ('Phase_Beginning', 'Step_Upkeep', 1) == (turn_info.get('phase'), turn_info.get('step'), turn_info.get('turnNumber')):
-                for (owner, hand) in self.cards_in_hand.items():
-                    self.opening_hand[owner] = hand.copy()
+            if not any(self.opening_hand) and ('Phase_Beginning', 'Step_Upkeep', 1) == (turn_info.get('phase'), turn_info.get('step'), turn_info.get('turnNumber')):
+                self.opening_hand = list(self.cards_in_hand)
 
     def __handle_client_to_gre_message(self, payload):
         if self.history_enabled:
@@ -489,7 +716,7 @@ class Follower:
                 'is_during_match': True,
             }
             logger.info(f'Deck submission via __handle_client_to_gre_message: {deck}')
-            response = self.__retry_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
+            self.__queue_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
 
     def __maybe_handle_game_over_stage(self, system_seat_ids, game_state_message):
         game_info = game_state_message.get('gameInfo', {})
@@ -497,62 +724,63 @@ class Follower:
             return
 
         results = game_info.get('results', [])
-        for result in reversed(results):
-            if result.get('scope') != 'MatchScope_Game':
-                continue
-
-            seat_id = system_seat_ids[0]
-            match_id = game_info['matchID']
-            event_id = None
-            if self.current_match_event_id is not None and self.current_match_event_id[0] == match_id:
-                event_id = self.current_match_event_id[1]
-
-            maybe_turn_number = game_state_message.get('turnInfo', {}).get('turnNumber')
-            if maybe_turn_number is None:
-                players = game_state_message.get('players', [])
-                if len(players) > 0:
-                    maybe_turn_number = sum(p['turnNumber'] for p in players)
-                    # If one of the player structs is missing, double the turn number to acount for it
-                    if len(players) == 1:
-                        maybe_turn_number *= 2
-                else:
-                    maybe_turn_number = -1
-
-            self.__send_game_end(
-                seat_id=seat_id,
-                match_id=match_id,
-                mulliganed_hands=self.drawn_hands[seat_id][:-1],
-                drawn_hands=self.drawn_hands[seat_id],
-                drawn_cards=list(self.drawn_cards_by_instance_id[seat_id].values()),
-                event_name=event_id,
-                on_play=seat_id == self.starting_team_id,
-                won=seat_id == result['winningTeamId'],
-                win_type=result['result'],
-                game_end_reason=result['reason'],
-                turn_count=maybe_turn_number,
-                duration=-1,
-            )
+        result = next((r for r in reversed(results) if r.get('scope') == 'MatchScope_Game'), None)
+        if result is None:
+            return
 
-            if game_info.get('matchState') == 'MatchState_MatchComplete':
-                self.__clear_match_data()
+        seat_id = system_seat_ids[0]
+        match_id = game_info['matchID']
+        event_id = None
+        if self.current_match_event_id is not None and self.current_match_event_id[0] == match_id:
+            event_id = self.current_match_event_id[1]
+
+        maybe_turn_number = game_state_message.get('turnInfo', {}).get('turnNumber')
+        if maybe_turn_number is None:
+            players = game_state_message.get('players', [])
+            if len(players) > 0:
+                maybe_turn_number = sum(map(itemgetter('turnNumber'), players))
+                # If one of the player structs is missing, double the turn number to acount for it
+                if len(players) == 1:
+                    maybe_turn_number *= 2
+            else:
+                maybe_turn_number = -1
 
-            return
+        self.__send_game_end(
+            seat_id=seat_id,
+            match_id=match_id,
+            mulliganed_hands=self.drawn_hands[seat_id][:-1],
+            drawn_hands=self.drawn_hands[seat_id],
+            drawn_cards=list(self.drawn_cards_by_instance_id[seat_id].values()),
+            event_name=event_id,
+            on_play=seat_id == self.starting_team_id,
+            won=seat_id == result['winningTeamId'],
+            win_type=result['result'],
+            game_end_reason=result['reason'],
+            turn_count=maybe_turn_number,
+            duration=-1,
+        )
+
+        if game_info.get('matchState') == 'MatchState_MatchComplete':
+            self.__clear_match_data()
 
 
     def __clear_game_data(self):
-        self.objects_by_owner.clear()
-        self.opening_hand_count_by_seat.clear()
-        self.opening_hand.clear()
-        self.drawn_hands.clear()
-        self.drawn_cards_by_instance_id.clear()
+        self.objects_by_owner = [{}, {}, {}]
+        self.opening_hand_count_by_seat = [0, 0, 0]
+        self.opening_hand = [(), (), ()]
+        self.drawn_hands = [[], [], []]
+        self.drawn_cards_by_instance_id = [{}, {}, {}]
         self.starting_team_id = None
-        self.game_history_events.clear()
+        # Reassigned rather than cleared, since a queued game blob may still reference the old list.
+        self.game_history_events = []
 
     def __clear_match_data(self):
         self.screen_names.clear()
 
     def __maybe_handle_account_info(self, line):
-        match = ACCOUNT_INFO_REGEX.match(line)
+        if 'Updated account. DisplayName:' not in line:
+            return
+        match = ACCOUNT_INFO_REGEX.search(line)
         if match:
             screen_name = match.group(1)
             self.cur_user = match.group(2)
@@ -576,7 +804,7 @@ class Follower:
             'losses': json_obj['ModuleInstanceData']['WinLossGate']['CurrentLosses'],
         }
         logger.info(f'Event submission: {event}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_EVENT_SUBMISSION}', blob=event)
+        self.__queue_post(f'{self.host}/{ENDPOINT_EVENT_SUBMISSION}', blob=event)
 
     def __handle_event_course(self, json_obj):
         """Handle messages linking draft id to event name."""
@@ -587,7 +815,7 @@ class Follower:
             'draft_id': json_obj['ModuleInstanceData']['HumanDraft._internalState']['DraftId'],
         }
         logger.info(f'Event course: {event}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_EVENT_COURSE_SUBMISSION}', blob=event)
+        self.__queue_post(f'{self.host}/{ENDPOINT_EVENT_COURSE_SUBMISSION}', blob=event)
 
     def __handle_game_end(self, json_obj):
         """Handle 'DuelScene.GameStop' messages."""
@@ -611,7 +839,7 @@ class Follower:
         logger.debug(f'End of game. Cards by owner: {self.objects_by_owner}')
 
         opponent_id = 2 if seat_id == 1 else 1
-        opponent_card_ids = [c for c in self.objects_by_owner.get(opponent_id, {}).values()]
+        opponent_card_ids = list(self.objects_by_owner[opponent_id].values())
 
         if match_id != self.cur_opponent_match_id:
             self.cur_opponent_level = None
@@ -651,7 +879,7 @@ class Follower:
                 'events': self.game_history_events,
             }
 
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_GAME_RESULT}', blob=game, use_gzip=True)
+        self.__queue_post(f'{self.host}/{ENDPOINT_GAME_RESULT}', blob=game, use_gzip=True)
         self.__clear_game_data()
 
     def __handle_login(self, json_obj):
@@ -683,7 +911,7 @@ class Follower:
                 'card_ids': [int(x) for x in json_obj['DraftPack']],
             }
             logger.info(f'Draft pack: {pack}')
-            response = self.__retry_post(f'{self.host}/{ENDPOINT_DRAFT_PACK}', blob=pack)
+            self.__queue_post(f'{self.host}/{ENDPOINT_DRAFT_PACK}', blob=pack)
 
     def __handle_draft_pick(self, json_obj):
         """Handle 'Draft.MakePick messages."""
@@ -700,7 +928,7 @@ class Follower:
             'card_id': int(inner_obj['cardId']),
         }
         logger.info(f'Draft pick: {pick}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_DRAFT_PICK}', blob=pick)
+        self.__queue_post(f'{self.host}/{ENDPOINT_DRAFT_PICK}', blob=pick)
 
     def __handle_joined_pod(self, json_obj):
         """Handle 'Event.JoinPodmaking messages."""
@@ -725,7 +953,7 @@ class Follower:
             'card_id': int(inner_obj['cardId']),
         }
         logger.info(f'Human draft pick: {pick}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PICK}', blob=pick)
+        self.__queue_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PICK}', blob=pick)
 
     def __handle_human_draft_pack(self, json_obj):
         """Handle 'Draft.Notify messages."""
@@ -741,7 +969,7 @@ class Follower:
             'card_ids': [int(x) for x in json_obj['PackCards'].split(',')],
         }
         logger.info(f'Human draft pack: {pack}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PACK}', blob=pack)
+        self.__queue_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PACK}', blob=pack)
 
     def __handle_draft_notification(self, json_obj):
         """Handle 'Draft.Notification messages."""
@@ -762,29 +990,29 @@ class Follower:
             'card_ids': pick_info['PackCards'],
         }
         logger.info(f'Human draft pack via notification: {pack}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PACK}', blob=pack)
+        self.__queue_post(f'{self.host}/{ENDPOINT_HUMAN_DRAFT_PACK}', blob=pack)
 
     def __handle_deck_submission(self, json_obj):
         """Handle 'Event.DeckSubmit' messages."""
         self.__clear_game_data()
         inner_obj = json_obj['params']
-        deck_info = json.loads(inner_obj['deck'])
+        deck_info = json_loads(inner_obj['deck'])
         deck = {
             'player_id': self.cur_user,
             'event_name': inner_obj['eventName'],
             'time': self.cur_log_time.isoformat(),
-            'maindeck_card_ids': [d['Id'] for d in deck_info['mainDeck'] for i in range(d['Quantity'])],
-            'sideboard_card_ids': [d['Id'] for d in deck_info['sideboard'] for i in range(d['Quantity'])],
+            'maindeck_card_ids': list(itertools.chain.from_iterable([d['Id']] * d['Quantity'] for d in deck_info['mainDeck'])),
+            'sideboard_card_ids': list(itertools.chain.from_iterable([d['Id']] * d['Quantity'] for d in deck_info['sideboard'])),
             'is_during_match': False,
         }
         logger.info(f'Deck submission via __handle_deck_submission: {deck}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
+        self.__queue_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
 
     def __handle_deck_submission_v3(self, json_obj):
         """Handle 'Event.DeckSubmitV3' messages."""
         self.__clear_game_data()
         inner_obj = json_obj['params']
-        deck_info = json.loads(inner_obj['deck'])
+        deck_info = json_loads(inner_obj['deck'])
         deck = {
             'player_id': self.cur_user,
             'event_name': inner_obj['eventName'],
@@ -795,7 +1023,7 @@ class Follower:
             'companion': deck_info.get('companionGRPId'),
         }
         logger.info(f'Deck submission via __handle_deck_submission_v3: {deck}')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
+        self.__queue_post(f'{self.host}/{ENDPOINT_DECK_SUBMISSION}', blob=deck)
 
     def __handle_self_rank_info(self, json_obj):
         """Handle 'Event.GetCombinedRankInfo' messages."""
@@ -837,18 +1065,26 @@ class Follower:
             'card_counts': json_obj,
         }
         logger.info(f'Collection submission of {len(json_obj)} cards')
-        response = self.__retry_post(f'{self.host}/{ENDPOINT_COLLECTION}', blob=collection)
+        self.__queue_post(f'{self.host}/{ENDPOINT_COLLECTION}', blob=collection)
 
     def __get_card_ids_from_decklist_v3(self, decklist):
         """Parse a list of [card_id_1, count_1, card_id_2, count_2, ...] elements."""
         assert len(decklist) % 2 == 0
-        result = []
-        for i in range(len(decklist) // 2):
-            card_id = decklist[2 * i]
-            count = decklist[2 * i + 1]
-            for j in range(count):
-                result.append(card_id)
-        return result
+        return list(itertools.chain.from_iterable(
+            [card_id] * count for card_id, count in zip(decklist[0::2], decklist[1::2])
+        ))
+
+def exit_immediately(status):
+    """
+    Flush output and exit without the usual interpreter shutdown (atexit handlers, Tk teardown).
+    Meant for fatal errors that have already been reported to the user.
+
+    :param status: The exit status.
+    """
+    for stream in (sys.stdout, sys.stderr):
+        if stream is not None:
+            stream.flush()
+    os._exit(status)
 
 def validate_uuid_v4(maybe_uuid):
     try:
@@ -857,12 +1093,24 @@ def validate_uuid_v4(maybe_uuid):
     except ValueError:
         return None
 
+def is_headless():
+    """
+    Check whether dialogs should be skipped in favor of the console, because MTGA_HEADLESS
+    is set or output is redirected. pythonw has no stdout but can show windows.
+    """
+    return (os.environ.get('MTGA_HEADLESS', '') not in ('', '0')
+        or (sys.stdout is not None and not sys.stdout.isatty()))
+
 def get_client_token_visual():
     import tkinter
     import tkinter.simpledialog
     import tkinter.messagebox
 
-    window = tkinter.Tk()
+    try:
+        window = tkinter.Tk()
+    except tkinter.TclError:
+        # No display, e.g. over SSH without X forwarding
+        return get_client_token_cli()
     window.wm_withdraw()
 
     message = 'Please enter your client token from 17lands.com/account:'
@@ -874,7 +1122,7 @@ def get_client_token_visual():
                 'Error: Client Token Needed',
                 'The program cannot continue without specifying a client token. Exiting.'
             )
-            exit(1)
+            exit_immediately(1)
 
         if validate_uuid_v4(token) is None:
             message = 'That token is invalid. Please specify a valid client token. See 17lands.com/getting_started for more details.'
@@ -888,29 +1136,33 @@ def get_client_token_cli():
 
         if token is None:
             print('Error: The program cannot continue without specifying a client token. Exiting.')
-            exit(1)
+            sys.exit(1)
 
         if validate_uuid_v4(token) is None:
             message = 'That token is invalid. Please specify a valid client token. See 17lands.com/getting_started for more details. Token: '
         else:
             return token
 
+@functools.lru_cache(maxsize=1)
 def get_config():
     import configparser
     token = None
     game_history = True
     config = configparser.ConfigParser()
-    if os.path.exists(CONFIG_FILE):
-        config.read(CONFIG_FILE)
-        if 'client' in config:
-            token = validate_uuid_v4(config['client'].get('token'))
-            game_history = config['client'].getboolean('game_history', fallback=True)
-
-    if token is None or validate_uuid_v4(token) is None:
-        try:
-            token = get_client_token_visual()
-        except ModuleNotFoundError:
+    # read() skips a missing file, so there's no need to check that it exists first
+    config.read(CONFIG_FILE)
+    if 'client' in config:
+        token = validate_uuid_v4(config['client'].get('token'))
+        game_history = config['client'].getboolean('game_history', fallback=True)
+
+    if token is None:
+        if is_headless():
             token = get_client_token_cli()
+        else:
+            try:
+                token = get_client_token_visual()
+            except ModuleNotFoundError:
+                token = get_client_token_cli()
 
         if 'client' not in config:
             config['client'] = {}
@@ -920,53 +1172,160 @@ def get_config():
 
     return token, game_history
 
-def verify_valid_version(host):
+def find_log_file(filepaths, listings=None):
+    """
+    Find the first of several possible log files that exists, listing each directory at most once.
+
+    :param filepaths: Candidate filenames, in order of preference.
+    :param listings:  Cache of directory listings, which can be shared between calls.
+
+    :returns: The first filename that exists, or None if none of them do.
+    """
+    if listings is None:
+        listings = {}
+    for filename in filepaths:
+        dirname, basename = os.path.split(filename)
+        if dirname not in listings:
+            try:
+                with os.scandir(dirname or os.curdir) as entries:
+                    listings[dirname] = {os.path.normcase(entry.name) for entry in entries}
+            except OSError:
+                listings[dirname] = set()
+        if os.path.normcase(basename) in listings[dirname]:
+            return filename
+    return None
+
+def get_min_client_version(host):
+    """
+    Ask the server for the minimum supported client version.
+
+    :param host: The host to query.
+
+    :returns: The minimum version string, or None if the server could not be reached.
+    """
     for i in range(3):
-        response = requests.get(f'{host}/{ENDPOINT_CLIENT_VERSION}')
+        # Connection failures are already retried by the session, so give up on any error here.
+        try:
+            response = SESSION.get(f'{host}/{ENDPOINT_CLIENT_VERSION}', timeout=VERSION_CHECK_TIMEOUT)
+        except requests.exceptions.RequestException as e:
+            logger.warning(f'Got error {e} for minimum client version. Assuming version is valid.')
+            return None
         if not IS_CODE_FOR_RETRY(response.status_code):
             break
         logger.warning(f'Got response code {response.status_code}; retrying')
         time.sleep(DEFAULT_RETRY_SLEEP_TIME)
     else:
         logger.warning('Could not get response from server for minimum client version. Assuming version is valid.')
-        return
+        return None
 
     logger.info(f'Got minimum client version response: {response.text}')
-    blob = json.loads(response.text)
-    this_version = [int(i) for i in CLIENT_VERSION.split('.')[:-1]]
-    min_supported_version = [int(i) for i in blob['min_version'].split('.')]
-    logger.info(f'Minimum supported version: {min_supported_version}; this version: {this_version}')
+    if not IS_SUCCESS_CODE(response.status_code):
+        logger.warning(f'Got response code {response.status_code} for minimum client version. Assuming version is valid.')
+        return None
 
-    if this_version >= min_supported_version:
+    try:
+        return json_loads(response.content)['min_version']
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f'Got unexpected response {e!r} for minimum client version. Assuming version is valid.')
+        return None
+
+def verify_valid_version(min_version):
+    """
+    Exit with an error message if this client is older than the minimum supported version.
+
+    :param min_version: The minimum version string from the server, or None to skip the check.
+    """
+    if min_version is None:
         return
 
-    import tkinter
-    import tkinter.messagebox
-    window = tkinter.Tk()
-    window.wm_withdraw()
-    tkinter.messagebox.showerror(
-        'MTGA Log Client Error: Client Update Needed',
-        (f'The minimum supported version for the client is {blob["min_version"]}. '
-            + f'Your current version is {CLIENT_VERSION}. Please download the latest '
-            + 'version of the client from https://github.com/rconroy293/mtga-log-client')
-    )
-    exit(1)
+    try:
+        min_supported_version = tuple(map(int, min_version.split('.')))
+    except (ValueError, AttributeError):
+        logger.warning(f'Got unparseable minimum client version {min_version!r}. Assuming version is valid.')
+        return
+    logger.info(f'Minimum supported version: {min_supported_version}; this version: {THIS_VERSION}')
 
+    if THIS_VERSION >= min_supported_version:
+        return
 
-def main():
-    import argparse
+    message = (f'The minimum supported version for the client is {min_version}. '
+        + f'Your current version is {CLIENT_VERSION}. Please download the latest '
+        + 'version of the client from https://github.com/rconroy293/mtga-log-client')
+    if not is_headless():
+        try:
+            import tkinter
+            import tkinter.messagebox
+        except ModuleNotFoundError:
+            pass
+        else:
+            # Tk() raises TclError when there is no display, e.g. over SSH without X forwarding.
+            try:
+                window = tkinter.Tk()
+                window.wm_withdraw()
+                tkinter.messagebox.showerror('MTGA Log Client Error: Client Update Needed', message)
+            except tkinter.TclError:
+                pass
+            else:
+                exit_immediately(1)
 
-    parser = argparse.ArgumentParser(description='MTGA log follower')
-    parser.add_argument('-l', '--log_file',
-        help=f'Log filename to process. If not specified, will try one of {POSSIBLE_CURRENT_FILEPATHS}')
-    parser.add_argument('--host', default=API_ENDPOINT,
-        help=f'Host to submit requests to. If not specified, will use {API_ENDPOINT}')
-    parser.add_argument('--once', action='store_true',
-        help='Whether to stop after parsing the file once (default is to continue waiting for updates to the file)')
+    print(f'Error: Client Update Needed. {message}', file=sys.stderr)
+    sys.exit(1)
 
-    args = parser.parse_args()
 
-    verify_valid_version(args.host)
+def parse_args(argv):
+    """
+    Parse command line arguments like argparse would, including attached short values
+    (-lPlayer.log) and unambiguous long option prefixes (--log). Exits with the usage
+    message on -h or bad arguments.
+
+    :param argv: The arguments, not including the program name.
+
+    :returns: The parsed Arguments.
+    """
+    def usage_error(message):
+        print(f'{USAGE}\n\nerror: {message}', file=sys.stderr)
+        sys.exit(2)
+
+    log_file, host, once = None, API_ENDPOINT, False
+    argv = iter(argv)
+    for arg in argv:
+        if arg.startswith('-l') and len(arg) > 2 and arg[2] != '=':
+            name, has_value, value = '-l', True, arg[2:]
+        else:
+            name, has_value, value = arg.partition('=')
+            if name.startswith('--') and name not in LONG_OPTIONS:
+                matches = [option for option in LONG_OPTIONS if option.startswith(name)]
+                if len(matches) > 1:
+                    usage_error(f'ambiguous option: {name} could match {", ".join(matches)}')
+                elif matches:
+                    name = matches[0]
+
+        if name in ('-h', '--help'):
+            print(USAGE)
+            sys.exit(0)
+        elif name == '--once' and not has_value:
+            once = True
+        elif name in ('-l', '--log_file', '--host'):
+            if not has_value:
+                value = next(argv, None)
+                if value is None or (value.startswith('-') and value != '-'):
+                    usage_error(f'argument {name} expected one argument')
+            if name == '--host':
+                host = value
+            else:
+                log_file = value
+        else:
+            usage_error(f'unrecognized arguments: {arg}')
+    return Arguments(log_file=log_file, host=host, once=once)
+
+def main():
+    args = parse_args(sys.argv[1:])
+
+    # The version request is the slowest part of startup, so overlap it with loading the config.
+    # Only the request runs in the background; any error dialog is still shown from this thread.
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    min_version = executor.submit(get_min_client_version, args.host)
+    executor.shutdown(wait=False)
 
     token, history_enabled = get_config()
     logger.info(f'Using token {token[:4]}...{token[-4:]} with history_enabled: {history_enabled}')
@@ -977,22 +1336,26 @@ def main():
 
     follow = not args.once
 
-    follower = Follower(token, host=args.host, history_enabled=history_enabled)
+    follower = Follower(token, host=args.host, history_enabled=history_enabled, session=SESSION)
+    verify_valid_version(min_version.result())
+
+    # The previous and current logs share a directory, so list each candidate directory once for both.
+    log_listings = {}
 
     # if running in "normal" mode...
     if args.log_file is None and args.host == API_ENDPOINT and follow:
         # parse previous log once at startup to catch up on any missed events
-        for filename in POSSIBLE_PREVIOUS_FILEPATHS:
-            if os.path.exists(filename):
-                logger.info(f'Parsing the previous log {filename} once')
-                follower.parse_log(filename=filename, follow=False)
-                break
+        filename = find_log_file(POSSIBLE_PREVIOUS_FILEPATHS, log_listings)
+        if filename is not None:
+            logger.info(f'Parsing the previous log {filename} once')
+            follower.parse_log(filename=filename, follow=False)
 
     # tail and parse current logfile to handle ongoing events
-    for filename in filepaths:
-        if os.path.exists(filename):
-            logger.info(f'Following along {filename}')
-            follower.parse_log(filename=filename, follow=follow)
+    # (looking again if it was missing, since it may have been created while parsing the previous log)
+    filename = find_log_file(filepaths, log_listings) or find_log_file(filepaths)
+    if filename is not None:
+        logger.info(f'Following along {filename}')
+        follower.parse_log(filename=filename, follow=follow)
 
 if __name__ == '__main__':
     main()
@@ -17,12 +17,16 @@ setuptools.setup(
         "Programming Language :: Python :: 3",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     entry_points={
         'console_scripts': [
             'seventeenlands=seventeenlands.mtga_follower:main',
         ],
     },
-    install_requires=["requests", "python-dateutil"]
+    install_requires=["requests", "python-dateutil"],
+    extras_require={
+        "fast": ["orjson"],
+        "watch": ["watchdog"],
+    },
 
 )
\ No newline at end of file